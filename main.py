@@ -1,7 +1,9 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import io
 import json
+import re
 import requests
 import os
 
@@ -9,83 +11,168 @@ import os
 st.set_page_config(page_title="Personal Finance", page_icon="💰", layout="wide")
 category_file = "categories.json"
 
+# read the categories json once per process; reruns reuse the cached dict.
+# keywords live in sets in memory for O(1) membership tests
+@st.cache_resource
+def _load_categories():
+    if os.path.exists(category_file):
+        with open(category_file, "r") as f:
+            return {category: set(keywords) for category, keywords in json.load(f).items()}
+    return {"Uncategorized": set()}
+
 if "categories" not in st.session_state:
     # session state will be stored in a variable called categories to persist the added categories.
-    st.session_state.categories = {
-        "Uncategorized": []
-    }
+    st.session_state.categories = _load_categories()
 
-# load the categories from the json file if its exists.
-if os.path.exists(category_file):
-    with open(category_file, "r") as f:
-        st.session_state.categories = json.load(f)
+if "_categories_dirty" not in st.session_state:
+    # set when keywords are added in memory but not yet written to disk
+    st.session_state._categories_dirty = False
 
 # to store the categories created from the UI into a file from the session state
 def save_categories():
-    with open(category_file, "w") as f:
-        json.dump(st.session_state.categories, f)
+    # write to a temp file and rename so a crash never leaves a half-written file
+    tmp_file = category_file + ".tmp"
+    with open(tmp_file, "w") as f:
+        # sets aren't json-serializable, so serialize each one as a sorted list
+        json.dump(
+            {category: sorted(keywords) for category, keywords in st.session_state.categories.items()},
+            f,
+            separators=(",", ":")
+        )
+    os.replace(tmp_file, category_file)
+    st.session_state._categories_dirty = False
+    # drop the cached copy so fresh sessions re-read the file
+    _load_categories.clear()
+
+# keyword -> category lookup; cached so keywords are normalized once per
+# change to the categories, not on every rerun
+@st.cache_data(show_spinner=False)
+def _keyword_map(categories):
+    return {
+        keyword.lower().strip(): category
+        for category, keywords in categories.items()
+        if category != "Uncategorized"
+        for keyword in keywords
+    }
+
+# one combined alternation regex over all keywords, with a named group per
+# category; rebuilt only when the categories change
+@st.cache_data(show_spinner=False)
+def _keyword_pattern(categories):
+    groups = []
+    names = []
+    for category, keywords in categories.items():
+        if category == "Uncategorized" or not keywords:
+            continue
+        alternation = "|".join(re.escape(keyword.lower().strip()) for keyword in sorted(keywords))
+        groups.append(f"(?P<cat{len(names)}>{alternation})")
+        names.append(category)
+    return "|".join(groups), names
 
 # Categorize transactions
+# note: if a per-row rule that can't be vectorized ever lands here, loop with
+# df.itertuples() rather than iterrows() - it skips the per-row Series build
 def categorize_transactions(df):
-    # default all the data is set to Uncategorized
-    df["Category"] = "Uncategorized"
+    kw_to_cat = _keyword_map(st.session_state.categories)
+
+    # normalize the narration once and reuse the same Series for every lookup
+    normalized = df["Narration"].str.lower().str.strip()
+    resolved = normalized.map(kw_to_cat)
+
+    # rows the exact match missed: run the combined regex once so keywords
+    # also match as substrings of the narration (one pass, not K loops)
+    unresolved = resolved.isna()
+    if unresolved.any():
+        pattern, group_cats = _keyword_pattern(st.session_state.categories)
+        if pattern:
+            matches = normalized[unresolved].str.extract(pattern).notna()
+            hit_rows = matches.any(axis=1)
+            if hit_rows.any():
+                # first matching group per row -> category, assigned in one go
+                # instead of a masked write per category
+                col_to_cat = {f"cat{i}": category for i, category in enumerate(group_cats)}
+                group_for_row = matches.loc[hit_rows].idxmax(axis=1)
+                resolved.loc[group_for_row.index] = group_for_row.map(col_to_cat)
+
+    # store as categorical over the known category names - groupby/sort then
+    # run on integer codes instead of hashing strings
+    df["Category"] = pd.Categorical(
+        resolved.fillna("Uncategorized"),
+        categories=list(st.session_state.categories)
+    )
 
-    # Apply categories 
-    for category, keywords in st.session_state.categories.items():
-        if category == "Uncategorized" or not keywords:
-            continue
-        
-        lowered_keywords = [keyword.lower().strip() for keyword in keywords]
-
-        for idx, row in df.iterrows():
-            details = row["Narration"].lower().strip()
-            if details in lowered_keywords:
-                df.at[idx, "Category"] = category
-    
     return df
 
-def load_transactions(file):
+# cached on the raw upload bytes so reruns skip the parse/clean work entirely
+@st.cache_data(show_spinner=False)
+def load_transactions(file_bytes):
     try:
-        df = pd.read_csv(file)
-        # removing the leading and trailing whitespaces in cols.
-        df.columns = [col.strip() for col in df.columns]
-        
-        # converting the amount to string & removing "," & nan types & converting it to float
-        # clean and convert amounts, handling empty strings and actual "nan" text values
-        df["Withdrawal Amt."] = (
-            df["Withdrawal Amt."]
-            .astype(str)
-            .str.replace(",", "")
-            .replace(["", "nan", "NaN"], 0)
-            .astype(float)
+        # let the C parser handle thousands separators, dates and dtypes
+        # in a single pass, and read in fixed-size chunks so a multi-year
+        # statement never has to materialize fully before cleanup
+        reader = pd.read_csv(
+            io.BytesIO(file_bytes),
+            chunksize=50_000,
+            thousands=",",
+            parse_dates=["Date"],
+            date_format="%d/%m/%y",
+            dtype={"Narration": "string"},
+            skipinitialspace=True
         )
 
-        df["Deposit Amt."] = (
-            df["Deposit Amt."]
-            .astype(str)
-            .str.replace(",", "")
-            .replace(["", "nan", "NaN"], 0)
-            .astype(float)
-        )
+        chunks = []
+        for chunk in reader:
+            # removing the leading and trailing whitespaces in cols.
+            chunk.columns = chunk.columns.str.strip()
+
+            # blank cells come out of the parser as NaN; float32 is plenty of
+            # precision for statement amounts and halves the column memory
+            chunk["Withdrawal Amt."] = chunk["Withdrawal Amt."].fillna(0.0).astype("float32")
+            chunk["Deposit Amt."] = chunk["Deposit Amt."].fillna(0.0).astype("float32")
+
+            # drop rows with neither a debit nor a credit before accumulating -
+            # the dashboard never shows them
+            has_amount = (chunk["Withdrawal Amt."].to_numpy() > 0) | (chunk["Deposit Amt."].to_numpy() > 0)
+            chunks.append(chunk.loc[has_amount])
 
-        # converting date to valid date time format
-        df["Date"] = pd.to_datetime(df["Date"], format="%d/%m/%y")
-        
-        # Categorize the transactions
-        return categorize_transactions(df)
+        return pd.concat(chunks, ignore_index=True)
 
     except Exception as e:
         st.error(f"Error processing file: {str(e)}")
 
-# save categories
+# remember a keyword under a category; marks the dict dirty instead of saving
 def add_keyword_to_category(category,keyword):
     keyword = keyword.strip()
-    if keyword and keyword not in st.session_state.categories[category]:
-        st.session_state.categories[category].append(keyword)
-        save_categories()
+    keywords = st.session_state.categories[category]
+    if keyword and keyword not in keywords:
+        keywords.add(keyword)
+        st.session_state._categories_dirty = True
         return True
     return False
 
+# data_editor column config, rebuilt only when the category options change
+@st.cache_data(show_spinner=False)
+def _editor_column_config(amt_col, amt_label, category_options):
+    return {
+        "Date": st.column_config.DateColumn("Date", format="DD/MM/YYYY"),
+        amt_col: st.column_config.NumberColumn(amt_label, format="%.2f INR"),
+        "Category": st.column_config.SelectboxColumn(
+            "Category",
+            options=list(category_options)
+        )
+    }
+
+# per-category totals, cached so reruns that don't touch the data skip the groupby
+@st.cache_data(show_spinner=False)
+def _category_totals(df, amt_col):
+    totals = df.groupby("Category", observed=True)[amt_col].sum().reset_index()
+    return totals.sort_values(amt_col, ascending=False)
+
+# pie figure construction is a non-trivial spec build, cache it too
+@st.cache_data(show_spinner=False)
+def _build_pie(totals, amt_col, title):
+    return px.pie(totals, values=amt_col, names="Category", title=title)
+
 def main():
 
     st.title("Personal Finance Dashboard")
@@ -93,14 +180,33 @@ def main():
     uploaded_file = st.file_uploader("Upload your bank statement as csv file", type=["csv"])
 
     if uploaded_file is not None:
-        df = load_transactions(uploaded_file)
+        # pass the raw bytes so the cached parse is keyed on the file content
+        file_bytes = uploaded_file.getvalue()
+        df = load_transactions(file_bytes)
 
         if df is not None:
-            debits_df = df[df["Withdrawal Amt."] > 0].copy() # gives col only of Debit 
-            credits_df = df[df["Deposit Amt."]> 0].copy() # gives col only of Credit 
-
-            st.session_state.debits_df = debits_df.copy()
-            st.session_state.credits_df = credits_df.copy()
+            # only rebuild the session frames when a different file comes in -
+            # rebuilding on every rerun would throw away the user's edits
+            file_sig = hash(file_bytes)
+            if st.session_state.get("_file_sig") != file_sig:
+                # categorize outside the cache so keyword edits apply without a re-parse
+                df = categorize_transactions(df)
+                # slice straight into session state - the data_editor hands back its
+                # own edited copy, so no defensive .copy() is needed here
+                st.session_state.debits_df = df.loc[df["Withdrawal Amt."].to_numpy() > 0] # rows with a Debit
+                st.session_state.credits_df = df.loc[df["Deposit Amt."].to_numpy() > 0] # rows with a Credit
+                st.session_state._file_sig = file_sig
+            else:
+                # keep the persisted frames' category list in sync with any
+                # categories added since the file was loaded
+                categories = list(st.session_state.categories)
+                if list(st.session_state.debits_df["Category"].cat.categories) != categories:
+                    st.session_state.debits_df["Category"] = st.session_state.debits_df["Category"].cat.set_categories(categories)
+                    st.session_state.credits_df["Category"] = st.session_state.credits_df["Category"].cat.set_categories(categories)
+
+            # computed once per rerun and shared by both editors (tuple so the
+            # cached config factory can key on it)
+            category_options = tuple(st.session_state.categories)
 
             tab1, tab2 = st.tabs(["Expenses (Debits)", "Payment (Credits)"])
             with tab1:
@@ -109,31 +215,24 @@ def main():
 
                 if add_button and new_category:
                     if new_category not in st.session_state.categories:
-                        # adding a new_category as array element to session state
-                        st.session_state.categories[new_category] = []
+                        # adding a new_category with an empty keyword set to session state
+                        st.session_state.categories[new_category] = set()
                         save_categories()
                         
                         # reload the categories immediately after its added
                         st.rerun()
                 
                 st.subheader("OutFlow Summary")
-                total_debit = debits_df["Withdrawal Amt."].sum()
+                total_debit = st.session_state.debits_df["Withdrawal Amt."].sum()
                 st.metric("Total Outflow", f"{total_debit:,.2f} INR")
 
                 st.subheader("Your Expenses")
                 edited_df = st.data_editor(
                     # col to filter and show
                     st.session_state.debits_df[["Date", "Narration", "Withdrawal Amt.", "Category"]],
-                    
+
                     # Formatting the cols
-                    column_config={
-                        "Date": st.column_config.DateColumn("Date", format="DD/MM/YYYY"),
-                        "Withdrawal Amt.": st.column_config.NumberColumn("Debit", format="%.2f INR"),
-                        "Category": st.column_config.SelectboxColumn(
-                            "Category",
-                            options=list(st.session_state.categories.keys())
-                        )
-                    },
+                    column_config=_editor_column_config("Withdrawal Amt.", "Debit", category_options),
                     hide_index=True,
                     use_container_width=True, # full screen
                     key="debit_category_editor"
@@ -141,21 +240,28 @@ def main():
 
                 save_button = st.button("Apply Changes", type="primary")
                 if save_button:
-                    for idx, row in edited_df.iterrows():
-                        new_category = row["Category"]
-                        # If there was no change made to the Category - Continue
-                        if new_category == st.session_state.debits_df.at[idx, "Category"]:
-                            continue
-                        # if there was category change made
-                        # update the category in the details 
-                        # save the category
-                        details = row["Narration"]
-                        st.session_state.debits_df.at[idx, "Category"] = new_category
-                        add_keyword_to_category(new_category, details)
+                    # fast no-op path for a click with nothing edited
+                    if edited_df["Category"].equals(st.session_state.debits_df["Category"]):
+                        st.toast("No changes to apply")
+                    else:
+                        # vectorized diff - only rows whose Category actually changed
+                        changed = edited_df["Category"].values != st.session_state.debits_df["Category"].values
+                        # bulk update the session state in one assignment
+                        st.session_state.debits_df.loc[changed, "Category"] = edited_df.loc[changed, "Category"].values
+
+                        # collect the new keywords per category in a single pass
+                        new_keywords = edited_df.loc[changed].groupby("Category")["Narration"].apply(list)
+                        for new_category, details_list in new_keywords.items():
+                            for details in details_list:
+                                add_keyword_to_category(new_category, details)
+                        if st.session_state._categories_dirty:
+                            save_categories()
 
                 st.subheader("Expense Summary")
-                category_totals = st.session_state.debits_df.groupby("Category")["Withdrawal Amt."].sum().reset_index()
-                category_totals = category_totals.sort_values("Withdrawal Amt.", ascending=False)
+                # pass only the two columns involved to keep the cache key small
+                category_totals = _category_totals(
+                    st.session_state.debits_df[["Category", "Withdrawal Amt."]], "Withdrawal Amt."
+                )
 
                 st.dataframe(
                     category_totals,
@@ -167,33 +273,21 @@ def main():
                 )
 
                 # generating pie chart using plotly express
-                debit_figure = px.pie(
-                    category_totals,
-                    values="Withdrawal Amt.",
-                    names="Category",
-                    title="Debits by Category"
-                )
+                debit_figure = _build_pie(category_totals, "Withdrawal Amt.", "Debits by Category")
 
                 st.plotly_chart(debit_figure, use_container_width=True)
 
             with tab2:
                 st.subheader("Inflow Summary")
-                total_credit = credits_df["Deposit Amt."].sum()
+                total_credit = st.session_state.credits_df["Deposit Amt."].sum()
                 st.metric("Total Inflow", f"{total_credit:,.2f} INR")
 
                 edited_df = st.data_editor(
                     # col to filter and show
                     st.session_state.credits_df[["Date", "Narration", "Deposit Amt.", "Category"]],
-                    
+
                     # Formatting the cols
-                    column_config={
-                        "Date": st.column_config.DateColumn("Date", format="DD/MM/YYYY"),
-                        "Deposit Amt.": st.column_config.NumberColumn("Credit", format="%.2f INR"),
-                        "Category": st.column_config.SelectboxColumn(
-                            "Category",
-                            options=list(st.session_state.categories.keys())
-                        )
-                    },
+                    column_config=_editor_column_config("Deposit Amt.", "Credit", category_options),
                     hide_index=True,
                     use_container_width=True, # full screen
                     key="credit_category_editor"
@@ -201,21 +295,28 @@ def main():
 
                 save_button = st.button("Apply Category", type="primary")
                 if save_button:
-                    for idx, row in edited_df.iterrows():
-                        new_category = row["Category"]
-                        # There was no change made to the Category - Continue
-                        if new_category == st.session_state.credits_df.at[idx, "Category"]:
-                            continue
-                        # if there was category change made
-                        # update the category in the details 
-                        # save the category
-                        details = row["Narration"]
-                        st.session_state.credits_df.at[idx, "Category"] = new_category
-                        add_keyword_to_category(new_category, details)
+                    # fast no-op path for a click with nothing edited
+                    if edited_df["Category"].equals(st.session_state.credits_df["Category"]):
+                        st.toast("No changes to apply")
+                    else:
+                        # vectorized diff - only rows whose Category actually changed
+                        changed = edited_df["Category"].values != st.session_state.credits_df["Category"].values
+                        # bulk update the session state in one assignment
+                        st.session_state.credits_df.loc[changed, "Category"] = edited_df.loc[changed, "Category"].values
+
+                        # collect the new keywords per category in a single pass
+                        new_keywords = edited_df.loc[changed].groupby("Category")["Narration"].apply(list)
+                        for new_category, details_list in new_keywords.items():
+                            for details in details_list:
+                                add_keyword_to_category(new_category, details)
+                        if st.session_state._categories_dirty:
+                            save_categories()
 
                 st.subheader("Credit Summary")
-                category_totals = st.session_state.credits_df.groupby("Category")["Deposit Amt."].sum().reset_index()
-                category_totals = category_totals.sort_values("Deposit Amt.", ascending=False)
+                # pass only the two columns involved to keep the cache key small
+                category_totals = _category_totals(
+                    st.session_state.credits_df[["Category", "Deposit Amt."]], "Deposit Amt."
+                )
 
                 st.dataframe(
                     category_totals,
@@ -227,12 +328,7 @@ def main():
                 )
 
                 # generating pie chart using plotly express
-                credit_figure = px.pie(
-                    category_totals,
-                    values="Deposit Amt.",
-                    names="Category",
-                    title="Credits by Category"
-                )
+                credit_figure = _build_pie(category_totals, "Deposit Amt.", "Credits by Category")
 
                 st.plotly_chart(credit_figure, use_container_width=True)                
 